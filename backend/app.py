@@ -16,7 +16,10 @@ from selenium.webdriver.common.keys import Keys
 from PIL import Image
 from flask_cors import CORS
 import json
+import math
 import datetime
+import uuid
+from collections import deque, OrderedDict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -42,15 +45,307 @@ browser_lock = threading.Lock()
 MAX_SCREENSHOTS = 3  # Keep fewer screenshots to reduce disk I/O
 SCREENSHOT_INTERVAL = 0.05  # Take screenshots every 0.05 seconds (20 FPS)
 
+# Input-to-frame latency tracing
+current_frame_id = 0
+current_frame_traces = []  # Traces carried by each frame until the client confirms receipt
+current_poll_id = 0  # Identifies each /get_screenshot_data response carrying traces
+pending_traces = []  # Dispatched input traces waiting for the next capture
+recent_traces = OrderedDict()  # trace_id -> trace, for client receive reports
+latency_samples = {}  # event_type -> stage -> deque of latencies in milliseconds
+trace_lock = threading.Lock()
+TRACE_HISTORY = 500  # Samples kept per event type and stage
+TRACE_TIMEOUT = 5.0  # Seconds before an undelivered trace is dropped unsampled
+MAX_PENDING_TRACES = 100  # Cap on traces waiting for a capture or a delivery
+LATENCY_PERCENTILES = [50, 90, 99]
+
 # Simplified key mapping with only the allowed keys
 KEY_MAPPING = {
     'ENTER': Keys.ENTER,
     'BACK_SPACE': Keys.BACK_SPACE
 }
 
-def setup_browser():
+# File extensions covering each blockable resource class; URLs without one are not blocked
+RESOURCE_CLASS_EXTENSIONS = {
+    'image': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'bmp', 'avif'],
+    'font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+    'media': ['mp4', 'webm', 'ogg', 'mp3', 'wav', 'm3u8', 'mov']
+}
+
+# Ad/tracker domains blocked by profiles that enable block_trackers
+TRACKER_DOMAINS = [
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'connect.facebook.net',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'criteo.com',
+    'taboola.com',
+    'outbrain.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'moatads.com',
+    'hotjar.com'
+]
+
+# Named browser profiles trading rendering fidelity for per-browser cost
+BROWSER_PROFILES = {
+    'full': {
+        'description': 'Full fidelity: all resources, animations and default cache',
+        'block_resources': [],
+        'block_trackers': False,
+        'disable_animations': False,
+        'disk_cache_size': None,
+        'extra_args': []
+    },
+    'balanced': {
+        'description': 'Blocks media files by extension (.mp4, .webm, ...) and trackers, disables animations',
+        'block_resources': ['media'],
+        'block_trackers': True,
+        'disable_animations': True,
+        'disk_cache_size': 50 * 1024 * 1024,
+        'extra_args': ['--mute-audio']
+    },
+    'lite': {
+        'description': ('Blocks image, font and media files by extension (.png, .woff, .mp4, ...) '
+                        'and trackers with a small cache for maximum density'),
+        'block_resources': ['image', 'font', 'media'],
+        'block_trackers': True,
+        'disable_animations': True,
+        'disk_cache_size': 10 * 1024 * 1024,
+        'extra_args': ['--mute-audio', '--disable-background-networking', '--renderer-process-limit=1']
+    }
+}
+DEFAULT_PROFILE = 'full'
+active_profile = None  # Name of the profile the running browser was started with
+last_cpu_sample = None  # (wall time, cpu seconds) of the previous resource usage reading
+
+# Client-registered viewport used to render and capture frames (None = native window size)
+client_viewport = None
+MIN_VIEWPORT_SIZE = 200
+MAX_VIEWPORT_WIDTH = 1920
+MAX_VIEWPORT_HEIGHT = 1080
+MAX_DEVICE_PIXEL_RATIO = 2.0  # Cap the capture resolution on high-density displays
+MAX_CAPTURE_PIXELS = 1920 * 1080  # Frames never exceed the original 1920x1080 capture
+
+# Injected into every document when a profile disables animations
+DISABLE_ANIMATIONS_SCRIPT = """
+    (function() {
+        const style = document.createElement('style');
+        style.textContent = '*, *::before, *::after { animation: none !important; ' +
+            'transition: none !important; scroll-behavior: auto !important; }';
+        const inject = () => (document.head || document.documentElement).appendChild(style);
+        if (document.documentElement) {
+            inject();
+        } else {
+            document.addEventListener('DOMContentLoaded', inject);
+        }
+    })();
+"""
+
+def get_blocked_urls(profile):
+    """Build the CDP Network.setBlockedURLs patterns a profile blocks."""
+    patterns = []
+    # Anchor on the path extension so hostnames like www.movistar.es never match
+    for resource_class in profile['block_resources']:
+        for ext in RESOURCE_CLASS_EXTENSIONS.get(resource_class, []):
+            for variant in (ext, ext.upper()):
+                patterns.extend([f"*/*.{variant}", f"*/*.{variant}?*"])
+    if profile['block_trackers']:
+        for domain in TRACKER_DOMAINS:
+            patterns.extend([f"*://{domain}/*", f"*://*.{domain}/*"])
+    return patterns
+
+def apply_browser_profile(driver, profile):
+    """Apply a profile's blocking and animation settings through CDP."""
+    driver.execute_cdp_cmd('Performance.enable', {})
+    
+    # The Network domain is only needed (and only costs event overhead) when blocking
+    blocked_urls = get_blocked_urls(profile)
+    if blocked_urls:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_urls})
+        logger.info(f"Blocking {len(blocked_urls)} URL patterns")
+    
+    if profile['disable_animations']:
+        driver.execute_cdp_cmd('Emulation.setEmulatedMedia', {
+            'features': [{'name': 'prefers-reduced-motion', 'value': 'reduce'}]
+        })
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': DISABLE_ANIMATIONS_SCRIPT})
+        logger.info("Animations disabled")
+
+def apply_viewport(driver, viewport):
+    """Render and capture at the client's viewport size through CDP."""
+    driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+        'width': viewport['width'],
+        'height': viewport['height'],
+        'deviceScaleFactor': viewport['device_pixel_ratio'],
+        # Mobile emulation would zoom out desktop-only pages, so frames would no
+        # longer share CSS pixel coordinates with elementFromPoint and ActionChains
+        'mobile': False
+    })
+    logger.info(f"Viewport set to {viewport['width']}x{viewport['height']} "
+                f"@{viewport['device_pixel_ratio']}x")
+
+def get_viewport_size():
+    """Get the size in CSS pixels that input coordinates are expressed in."""
+    if client_viewport is not None:
+        return {'width': client_viewport['width'], 'height': client_viewport['height']}
+    width, height = browser.execute_script("return [window.innerWidth, window.innerHeight];")
+    return {'width': width, 'height': height}
+
+def start_input_trace(event_type):
+    """Create a trace for an input event as soon as its request arrives."""
+    return {
+        'trace_id': uuid.uuid4().hex[:16],
+        'event_type': event_type,
+        'received': time.time()
+    }
+
+def is_trace_stale(trace, now):
+    """Check whether a trace waited too long to give a meaningful sample."""
+    return now - trace['received'] > TRACE_TIMEOUT
+
+def record_input_dispatched(trace):
+    """Mark an input as dispatched so the next capture picks up its trace."""
+    global pending_traces
+    
+    trace['dispatched'] = time.time()
+    with trace_lock:
+        # Without a running capture thread nothing drains the pending list
+        pending_traces = [t for t in pending_traces if not is_trace_stale(t, trace['dispatched'])]
+        pending_traces = pending_traces[-(MAX_PENDING_TRACES - 1):] + [trace]
+        recent_traces[trace['trace_id']] = trace
+        while len(recent_traces) > TRACE_HISTORY:
+            recent_traces.popitem(last=False)
+
+def take_pending_traces(capture_started):
+    """Claim the traces dispatched before a capture started."""
+    global pending_traces
+    
+    with trace_lock:
+        claimed = [t for t in pending_traces if t['dispatched'] <= capture_started]
+        pending_traces = [t for t in pending_traces if t['dispatched'] > capture_started]
+    return [t for t in claimed if not is_trace_stale(t, capture_started)]
+
+def add_latency_sample(event_type, stage, value_ms):
+    """Record one latency sample for an event type and pipeline stage."""
+    with trace_lock:
+        stages = latency_samples.setdefault(event_type, {})
+        stages.setdefault(stage, deque(maxlen=TRACE_HISTORY)).append(value_ms)
+
+def record_trace_delivered(trace, delivered_at):
+    """Mark a trace as delivered and record its per-stage latencies."""
+    trace['delivered'] = delivered_at
+    stages = [
+        ('dispatch', 'received', 'dispatched'),
+        ('capture', 'dispatched', 'captured'),
+        ('encode', 'captured', 'encoded'),
+        ('publish', 'encoded', 'published'),
+        ('delivery', 'published', 'delivered'),
+        ('server_total', 'received', 'delivered')
+    ]
+    for stage, start, end in stages:
+        add_latency_sample(trace['event_type'], stage, (trace[end] - trace[start]) * 1000)
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def get_latency_summary():
+    """Aggregate recorded latencies into percentiles per event type and stage."""
+    with trace_lock:
+        snapshot = {
+            event_type: {stage: sorted(values) for stage, values in stages.items()}
+            for event_type, stages in latency_samples.items()
+        }
+    
+    summary = {}
+    for event_type, stages in snapshot.items():
+        summary[event_type] = {}
+        for stage, values in stages.items():
+            if not values:
+                continue
+            stats = {"count": len(values), "max_ms": round(values[-1], 1)}
+            for pct in LATENCY_PERCENTILES:
+                stats[f"p{pct}_ms"] = round(percentile(values, pct), 1)
+            summary[event_type][stage] = stats
+    return summary
+
+def get_process_tree(root_pid):
+    """Return root_pid and all of its descendant PIDs (Linux /proc only)."""
+    children = {}
+    for stat_path in glob.glob('/proc/[0-9]*/stat'):
+        try:
+            with open(stat_path) as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            pid = int(stat_path.split('/')[2])
+            children.setdefault(int(fields[1]), []).append(pid)
+        except (OSError, IndexError, ValueError):
+            continue
+    
+    pids = []
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+def get_browser_resource_usage():
+    """Report memory and CPU used by the browser process tree and its page."""
+    global last_cpu_sample
+    
+    usage = {"profile": active_profile, "process_count": 0, "rss_mb": None, "cpu_percent": None}
+    
+    service_process = getattr(browser.service, 'process', None)
+    if service_process is not None and os.path.isdir('/proc'):
+        rss_kb = 0
+        cpu_ticks = 0
+        pids = get_process_tree(service_process.pid)
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                cpu_ticks += int(fields[11]) + int(fields[12])  # utime + stime
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            rss_kb += int(line.split()[1])
+                            break
+            except (OSError, IndexError, ValueError):
+                continue
+        
+        now = time.time()
+        cpu_seconds = cpu_ticks / os.sysconf('SC_CLK_TCK')
+        if last_cpu_sample is not None and now > last_cpu_sample[0]:
+            usage["cpu_percent"] = round(
+                max(0.0, cpu_seconds - last_cpu_sample[1]) / (now - last_cpu_sample[0]) * 100, 1)
+        last_cpu_sample = (now, cpu_seconds)
+        
+        usage["process_count"] = len(pids)
+        usage["rss_mb"] = round(rss_kb / 1024, 1)
+    
+    # Page-level metrics reported by the renderer
+    metrics = browser.execute_cdp_cmd('Performance.getMetrics', {}).get('metrics', [])
+    metrics = {m['name']: m['value'] for m in metrics}
+    usage["js_heap_used_mb"] = round(metrics.get('JSHeapUsedSize', 0) / (1024 * 1024), 1)
+    usage["task_duration_seconds"] = round(metrics.get('TaskDuration', 0), 3)
+    usage["nodes"] = int(metrics.get('Nodes', 0))
+    
+    return usage
+
+def setup_browser(profile_name=None):
     """Initialize the headless browser with detailed logging."""
-    global browser
+    global browser, active_profile, last_cpu_sample
+    
+    profile_name = profile_name or DEFAULT_PROFILE
+    if profile_name not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile: {profile_name}")
+    profile = BROWSER_PROFILES[profile_name]
     
     with browser_lock:
         if browser is not None:
@@ -58,7 +353,7 @@ def setup_browser():
             return browser
         
         try:
-            logger.info("Setting up Chrome browser...")
+            logger.info(f"Setting up Chrome browser with profile '{profile_name}'...")
             chrome_options = Options()
             chrome_options.add_argument("--headless")
             chrome_options.add_argument("--no-sandbox")
@@ -68,6 +363,10 @@ def setup_browser():
             chrome_options.add_argument("--disable-extensions")
             chrome_options.add_argument("--disable-dev-tools")
             chrome_options.add_argument("--remote-debugging-port=9222")  # Add debugging port
+            if profile['disk_cache_size'] is not None:
+                chrome_options.add_argument(f"--disk-cache-size={profile['disk_cache_size']}")
+            for arg in profile['extra_args']:
+                chrome_options.add_argument(arg)
             
             # Use the system Chrome binary
             chrome_binary_path = "/snap/bin/chromium"  # Path to Chrome binary
@@ -82,6 +381,13 @@ def setup_browser():
             browser.set_window_size(1920, 1080)
             logger.info("Chrome webdriver instance created successfully")
             
+            apply_browser_profile(browser, profile)
+            active_profile = profile_name
+            last_cpu_sample = None
+            
+            if client_viewport is not None:
+                apply_viewport(browser, client_viewport)
+            
             logger.info("Navigating to initial page (Google)...")
             browser.get("https://www.google.com")
             logger.info("Initial navigation successful")
@@ -98,6 +404,7 @@ def setup_browser():
                 except:
                     pass
                 browser = None
+            active_profile = None
             raise
 
 def cleanup_old_screenshots():
@@ -135,6 +442,7 @@ def start_screenshot_thread():
 def take_screenshots():
     """Take screenshots continuously at a higher frame rate with optimizations for lower latency."""
     global keep_taking_screenshots, current_screenshot, current_screenshot_data, browser
+    global current_frame_id, current_frame_traces
     
     logger.info("Screenshot thread running")
     last_cleanup_time = time.time()
@@ -150,6 +458,7 @@ def take_screenshots():
             
             # Take screenshot directly as PNG bytes
             screenshot_png = browser.get_screenshot_as_png()
+            captured_at = time.time()
             
             # Generate a timestamp for the filename
             timestamp = time.strftime("%Y%m%d-%H%M%S-%f")[:19]
@@ -159,11 +468,25 @@ def take_screenshots():
             # Process in parallel: update the base64 data immediately
             # while also writing to disk in the background
             base64_data = base64.b64encode(screenshot_png).decode('utf-8')
+            encoded_at = time.time()
+            
+            # Attach inputs dispatched before this capture started to the frame
+            traces = take_pending_traces(start_time)
+            for trace in traces:
+                trace['captured'] = captured_at
+                trace['encoded'] = encoded_at
             
             # Update current screenshot data immediately for low latency
             with screenshot_lock:
                 current_screenshot = filename
                 current_screenshot_data = base64_data
+                current_frame_id += 1
+                published_at = time.time()
+                for trace in traces:
+                    trace['published'] = published_at
+                # Undelivered traces ride along until a frame reaches the client
+                carried = [t for t in current_frame_traces if not is_trace_stale(t, published_at)]
+                current_frame_traces = (carried + traces)[-MAX_PENDING_TRACES:]
             
             # Write to disk (this can be slow)
             with open(filepath, "wb") as f:
@@ -195,9 +518,20 @@ def start_browser():
     global browser
     
     try:
-        logger.info("Received request to start browser")
-        browser = setup_browser()
-        return jsonify({"status": "success", "message": "Browser started"})
+        profile_name = (request.get_json(silent=True) or {}).get('profile') or DEFAULT_PROFILE
+        logger.info(f"Received request to start browser with profile '{profile_name}'")
+        
+        if profile_name not in BROWSER_PROFILES:
+            return jsonify({"status": "error", "message": f"Unknown browser profile: {profile_name}"})
+        
+        if browser is not None and active_profile != profile_name:
+            return jsonify({
+                "status": "error",
+                "message": f"Browser already running with profile '{active_profile}', stop it first to switch"
+            })
+        
+        browser = setup_browser(profile_name)
+        return jsonify({"status": "success", "message": f"Browser started with profile '{profile_name}'"})
     except Exception as e:
         logger.error(f"Error starting browser: {str(e)}", exc_info=True)
         return jsonify({"status": "error", "message": f"Failed to start browser: {str(e)}"})
@@ -205,7 +539,7 @@ def start_browser():
 @app.route('/stop_browser', methods=['POST'])
 def stop_browser():
     """Stop the browser and screenshot thread."""
-    global browser, keep_taking_screenshots
+    global browser, keep_taking_screenshots, active_profile
     
     try:
         logger.info("Received request to stop browser")
@@ -216,8 +550,13 @@ def stop_browser():
                 logger.info("Quitting browser...")
                 browser.quit()
                 browser = None
+                active_profile = None
                 logger.info("Browser stopped")
         
+        # Inputs that never reached a frame cannot be completed any more
+        with trace_lock:
+            pending_traces.clear()
+        
         return jsonify({"status": "success", "message": "Browser stopped"})
     except Exception as e:
         logger.error(f"Error stopping browser: {str(e)}", exc_info=True)
@@ -280,13 +619,16 @@ def click():
                 logger.error(f"Failed to auto-start browser: {str(e)}", exc_info=True)
                 return jsonify({"status": "error", "message": f"Failed to start browser: {str(e)}"})
         
-        # Get the current window size
-        window_size = browser.get_window_size()
-        logger.info(f"Current window size: {window_size}")
+        # Traced from here so browser startup is not counted as dispatch time
+        trace = start_input_trace('click')
+        
+        # Get the current viewport size (client-registered or native window)
+        viewport_size = get_viewport_size()
+        logger.info(f"Current viewport size: {viewport_size}")
         
         # Ensure coordinates are within bounds
-        x = max(0, min(x, window_size['width']))
-        y = max(0, min(y, window_size['height']))
+        x = max(0, min(x, viewport_size['width']))
+        y = max(0, min(y, viewport_size['height']))
         
         # Add visual click indicator before performing the actual click
         script = f"""
@@ -364,9 +706,11 @@ def click():
             logger.info(f"JavaScript click result: {result}")
             
             if result and result.get('success'):
+                record_input_dispatched(trace)
                 return jsonify({
                     "status": "success", 
-                    "message": f"Clicked element at ({x}, {y}): {result.get('element')}"
+                    "message": f"Clicked element at ({x}, {y}): {result.get('element')}",
+                    "trace_id": trace['trace_id']
                 })
             
             # Method 2: Fall back to ActionChains with additional focus handling
@@ -395,9 +739,11 @@ def click():
             """)
             
             logger.info("Click performed with ActionChains")
+            record_input_dispatched(trace)
             return jsonify({
                 "status": "success", 
-                "message": f"Clicked at coordinates ({x}, {y}) using ActionChains"
+                "message": f"Clicked at coordinates ({x}, {y}) using ActionChains",
+                "trace_id": trace['trace_id']
             })
                 
         except Exception as e:
@@ -428,6 +774,8 @@ def scroll():
                 logger.error(f"Failed to auto-start browser: {str(e)}", exc_info=True)
                 return jsonify({"status": "error", "message": f"Failed to start browser: {str(e)}"})
         
+        trace = start_input_trace('scroll')
+        
         # Convert the delta values to a reasonable scroll amount
         # Adjust these multipliers based on testing
         scroll_x = int(delta_x * 0.5)
@@ -439,13 +787,15 @@ def scroll():
             return [window.scrollX, window.scrollY];
         """
         scroll_position = browser.execute_script(script)
+        record_input_dispatched(trace)
         
         logger.info(f"Scrolled by ({scroll_x}, {scroll_y}), new position: {scroll_position}")
         
         return jsonify({
             "status": "success",
             "message": f"Scrolled by ({scroll_x}, {scroll_y})",
-            "position": scroll_position
+            "position": scroll_position,
+            "trace_id": trace['trace_id']
         })
         
     except Exception as e:
@@ -474,16 +824,20 @@ def type_text():
                 logger.error(f"Failed to auto-start browser: {str(e)}", exc_info=True)
                 return jsonify({"status": "error", "message": f"Failed to start browser: {str(e)}"})
         
+        trace = start_input_trace('type_text')
+        
         # Use ActionChains to send the text to the active element
         actions = ActionChains(browser)
         actions.send_keys(text)
         actions.perform()
+        record_input_dispatched(trace)
         
         logger.info(f"Text input sent: '{text}'")
         
         return jsonify({
             "status": "success",
-            "message": f"Text input sent: '{text}'"
+            "message": f"Text input sent: '{text}'",
+            "trace_id": trace['trace_id']
         })
         
     except Exception as e:
@@ -517,6 +871,8 @@ def send_key():
                 logger.error(f"Failed to auto-start browser: {str(e)}", exc_info=True)
                 return jsonify({"status": "error", "message": f"Failed to start browser: {str(e)}"})
         
+        trace = start_input_trace('send_key')
+        
         # Map the key to Selenium Keys
         selenium_key = KEY_MAPPING.get(key)
         
@@ -536,18 +892,65 @@ def send_key():
         
         # Perform the action
         actions.perform()
+        record_input_dispatched(trace)
         
         logger.info(f"Key sent: {key} with modifiers: {modifiers}")
         
         return jsonify({
             "status": "success",
-            "message": f"Key sent: {key}"
+            "message": f"Key sent: {key}",
+            "trace_id": trace['trace_id']
         })
         
     except Exception as e:
         logger.error(f"Error sending key: {str(e)}", exc_info=True)
         return jsonify({"status": "error", "message": f"Key input error: {str(e)}"})
 
+@app.route('/set_viewport', methods=['POST'])
+def set_viewport():
+    """Register the client's display size so frames are rendered and captured to match it."""
+    global client_viewport
+    
+    try:
+        width = request.json.get('width')
+        height = request.json.get('height')
+        device_pixel_ratio = request.json.get('device_pixel_ratio', 1)
+        logger.info(f"Received viewport registration: {width}x{height} @{device_pixel_ratio}x")
+        
+        if width is None or height is None:
+            logger.warning("Viewport request missing dimensions")
+            return jsonify({"status": "error", "message": "Width and height are required"})
+        
+        # Keep the viewport within sane bounds
+        width = max(MIN_VIEWPORT_SIZE, min(int(width), MAX_VIEWPORT_WIDTH))
+        height = max(MIN_VIEWPORT_SIZE, min(int(height), MAX_VIEWPORT_HEIGHT))
+        
+        # Lower the pixel ratio until the captured frame fits the pixel budget
+        budget_ratio = math.sqrt(MAX_CAPTURE_PIXELS / (width * height))
+        device_pixel_ratio = min(float(device_pixel_ratio), MAX_DEVICE_PIXEL_RATIO, budget_ratio)
+        device_pixel_ratio = max(1.0, math.floor(device_pixel_ratio * 100) / 100)
+        
+        viewport = {
+            'width': width,
+            'height': height,
+            'device_pixel_ratio': device_pixel_ratio
+        }
+        
+        with browser_lock:
+            client_viewport = viewport
+            if browser is not None:
+                apply_viewport(browser, viewport)
+        
+        return jsonify({
+            "status": "success",
+            "message": f"Viewport set to {viewport['width']}x{viewport['height']}",
+            "viewport": viewport
+        })
+        
+    except Exception as e:
+        logger.error(f"Error setting viewport: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": f"Viewport error: {str(e)}"})
+
 @app.route('/get_latest_screenshot')
 def get_latest_screenshot():
     """Get the filename of the latest screenshot."""
@@ -557,12 +960,74 @@ def get_latest_screenshot():
 @app.route('/get_screenshot_data')
 def get_screenshot_data():
     """Get the base64 encoded data of the latest screenshot for direct streaming."""
+    global current_frame_traces, current_poll_id
+    
     with screenshot_lock:
         if current_screenshot_data:
-            return jsonify({"data": current_screenshot_data})
+            # Traces ride along on every response until the client confirms one via
+            # /trace_report, since a response may be aborted before it arrives
+            now = time.time()
+            current_frame_traces = [t for t in current_frame_traces if not is_trace_stale(t, now)]
+            current_poll_id += 1
+            for trace in current_frame_traces:
+                trace.setdefault('sent', {})[current_poll_id] = now
+            return jsonify({
+                "data": current_screenshot_data,
+                "frame_id": current_frame_id,
+                "poll_id": current_poll_id,
+                "trace_ids": [t['trace_id'] for t in current_frame_traces]
+            })
         else:
             return jsonify({"data": None})
 
+@app.route('/trace_report', methods=['POST'])
+def trace_report():
+    """Record the client's receipt of the first frame carrying a traced input event."""
+    global current_frame_traces
+    
+    try:
+        trace_id = request.json.get('trace_id')
+        poll_id = request.json.get('poll_id')
+        client_latency_ms = request.json.get('client_latency_ms')
+        
+        if not trace_id or poll_id is None or client_latency_ms is None:
+            return jsonify({"status": "error", "message": "trace_id, poll_id and client_latency_ms are required"})
+        
+        with trace_lock:
+            trace = recent_traces.get(trace_id)
+        
+        if trace is None:
+            return jsonify({"status": "error", "message": f"Unknown trace: {trace_id}"})
+        
+        with screenshot_lock:
+            delivered_at = trace.get('sent', {}).get(int(poll_id))
+            if delivered_at is None:
+                return jsonify({"status": "error", "message": f"Trace {trace_id} was not sent in poll {poll_id}"})
+            
+            current_frame_traces = [t for t in current_frame_traces if t is not trace]
+            if 'delivered' not in trace:
+                record_trace_delivered(trace, delivered_at)
+        
+        if 'client_latency_ms' not in trace:
+            trace['client_latency_ms'] = float(client_latency_ms)
+            add_latency_sample(trace['event_type'], 'client_total', trace['client_latency_ms'])
+        
+        return jsonify({"status": "success", "message": f"Trace {trace_id} recorded"})
+        
+    except Exception as e:
+        logger.error(f"Error recording trace report: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": f"Trace report error: {str(e)}"})
+
+@app.route('/latency_stats')
+def latency_stats():
+    """Get percentile input-to-frame latencies per event type and pipeline stage.
+    
+    The delivery stage ends when the response the client confirmed receiving was
+    built, so inputs never confirmed through /trace_report have no delivery,
+    server_total or client_total samples.
+    """
+    return jsonify({"status": "success", "data": get_latency_summary()})
+
 @app.route('/screenshots/<filename>')
 def serve_screenshot(filename):
     """Serve a screenshot file."""
@@ -573,7 +1038,30 @@ def browser_status():
     """Check if browser is running."""  
     is_running = browser is not None
     logger.info(f"Browser status check: {'running' if is_running else 'not running'}")
-    return jsonify({"running": is_running})
+    return jsonify({"running": is_running, "profile": active_profile, "viewport": client_viewport})
+
+@app.route('/browser_profiles')
+def browser_profiles():
+    """List the available browser profiles and the one currently in use."""
+    profiles = {
+        name: {**profile, "blocked_url_patterns": len(get_blocked_urls(profile))}
+        for name, profile in BROWSER_PROFILES.items()
+    }
+    return jsonify({"profiles": profiles, "default": DEFAULT_PROFILE, "active": active_profile})
+
+@app.route('/browser_stats')
+def browser_stats():
+    """Report memory and CPU usage of the running browser."""
+    if browser is None:
+        return jsonify({"status": "error", "message": "Browser is not running"})
+    
+    try:
+        usage = get_browser_resource_usage()
+        logger.info(f"Browser stats: {usage}")
+        return jsonify({"status": "success", "data": usage})
+    except Exception as e:
+        logger.error(f"Error reading browser stats: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": f"Browser stats error: {str(e)}"})
 
 @app.route('/system_info')
 def system_info():
@@ -588,7 +1076,9 @@ def system_info():
         "screenshot_dir": SCREENSHOT_DIR,
         "screenshot_count": len(glob.glob(os.path.join(SCREENSHOT_DIR, "screenshot-*.png"))),
         "screenshot_interval": f"{SCREENSHOT_INTERVAL} seconds",
-        "max_screenshots": MAX_SCREENSHOTS
+        "max_screenshots": MAX_SCREENSHOTS,
+        "browser_profile": active_profile,
+        "viewport": client_viewport
     }
     logger.info(f"System info: {info}")
     return jsonify(info)
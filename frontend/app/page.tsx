@@ -18,6 +18,9 @@ export default function Home() {
   const [screenshotData, setScreenshotData] = useState<string | null>(null)
   const [performanceMode, setPerformanceMode] = useState<'high' | 'medium' | 'low'>('high')
   const [isBrowserRunning, setIsBrowserRunning] = useState(false)
+  const [viewport, setViewport] = useState({ width: 1920, height: 1080 })
+  const [browserProfile, setBrowserProfile] = useState('full')
+  const [availableProfiles, setAvailableProfiles] = useState<string[]>(['full', 'balanced', 'lite'])
 
   const screenshotRef = useRef<HTMLImageElement>(null)
   const overlayRef = useRef<HTMLDivElement>(null)
@@ -25,9 +28,19 @@ export default function Home() {
   const directStreamIntervalRef = useRef<NodeJS.Timeout | null>(null)
   const scrollAccumulatorRef = useRef<{ deltaX: number; deltaY: number }>({ deltaX: 0, deltaY: 0 })
   const scrollTimeoutRef = useRef<NodeJS.Timeout | null>(null)
+  const browserViewRef = useRef<HTMLDivElement>(null)
+  const resizeTimeoutRef = useRef<NodeJS.Timeout | null>(null)
+  // Input latency tracing: send time of inputs awaiting their first frame,
+  // receipt of trace IDs seen in frames before their input's response, and
+  // IDs already reported (still carried by polls built before the report landed)
+  const pendingTracesRef = useRef<Map<string, number>>(new Map())
+  const receivedTracesRef = useRef<Map<string, { receivedAt: number; pollId: number }>>(new Map())
+  const reportedTracesRef = useRef<Map<string, number>>(new Map())
   
   const { showNotification } = useNotification()
 
+  const TRACE_MAX_AGE_MS = 10000
+
   const STREAM_INTERVALS = {
     high: 50,
     medium: 100,
@@ -40,6 +53,9 @@ export default function Home() {
   useEffect(() => {
     // Check browser status on component mount
     checkBrowserStatus()
+    loadBrowserProfiles()
+    // Register even when stopped: the backend applies it when any request starts the browser
+    registerViewport()
     return () => {
       // Clean up streaming on unmount
       if (directStreamIntervalRef.current) {
@@ -48,6 +64,23 @@ export default function Home() {
     }
   }, [])
 
+  useEffect(() => {
+    // Re-register the viewport when the display size changes
+    const handleResize = () => {
+      if (resizeTimeoutRef.current) {
+        clearTimeout(resizeTimeoutRef.current)
+      }
+      resizeTimeoutRef.current = setTimeout(registerViewport, 300)
+    }
+    window.addEventListener('resize', handleResize)
+    return () => {
+      window.removeEventListener('resize', handleResize)
+      if (resizeTimeoutRef.current) {
+        clearTimeout(resizeTimeoutRef.current)
+      }
+    }
+  }, [])
+
   // Adjust overlay when screenshot loads
   const handleScreenshotLoad = () => {
     if (screenshotRef.current && overlayRef.current) {
@@ -89,6 +122,114 @@ export default function Home() {
     logToConsole(message, isError)
   }
 
+  const registerViewport = async () => {
+    if (!browserViewRef.current) return
+    
+    try {
+      // Match the remote viewport to the box the stream is shown in: the
+      // monitor frame's max height minus its borders and control header
+      const rect = browserViewRef.current.getBoundingClientRect()
+      const monitorFrame = browserViewRef.current.closest('.monitorFrame') as HTMLElement | null
+      const header = monitorFrame?.querySelector('.browserHeader') as HTMLElement | null
+      let availableHeight = window.innerHeight - rect.top
+      if (monitorFrame) {
+        const frameStyle = window.getComputedStyle(monitorFrame)
+        const maxFrameHeight = parseFloat(frameStyle.maxHeight) || window.innerHeight
+        const frameBorders = parseFloat(frameStyle.borderTopWidth) + parseFloat(frameStyle.borderBottomWidth)
+        availableHeight = maxFrameHeight - frameBorders - (header?.offsetHeight || 0)
+      }
+      const width = Math.round(rect.width)
+      const height = Math.round(Math.max(200, availableHeight))
+      const devicePixelRatio = window.devicePixelRatio || 1
+      
+      const response = await fetch(`${API_URL}/set_viewport`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ width, height, device_pixel_ratio: devicePixelRatio })
+      })
+      
+      const data = await response.json()
+      
+      if (data.status === 'success') {
+        setViewport({ width: data.viewport.width, height: data.viewport.height })
+        logToConsole(data.message)
+      } else {
+        showStatus(data.message, true)
+      }
+    } catch (error) {
+      showStatus(`Error setting viewport: ${error}`, true)
+    }
+  }
+
+  const reportTrace = async (traceId: string, pollId: number, latencyMs: number) => {
+    reportedTracesRef.current.set(traceId, performance.now())
+    try {
+      await fetch(`${API_URL}/trace_report`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ trace_id: traceId, poll_id: pollId, client_latency_ms: latencyMs })
+      })
+    } catch (error) {
+      console.error('Error reporting trace:', error)
+    }
+  }
+
+  // Forget traces whose frame or input response never arrived (stream stopped,
+  // aborted polls, or traces the server dropped as stale)
+  const pruneTraces = (now: number) => {
+    for (const [traceId, sentAt] of pendingTracesRef.current) {
+      if (now - sentAt > TRACE_MAX_AGE_MS) pendingTracesRef.current.delete(traceId)
+    }
+    for (const [traceId, { receivedAt }] of receivedTracesRef.current) {
+      if (now - receivedAt > TRACE_MAX_AGE_MS) receivedTracesRef.current.delete(traceId)
+    }
+    for (const [traceId, reportedAt] of reportedTracesRef.current) {
+      if (now - reportedAt > TRACE_MAX_AGE_MS) reportedTracesRef.current.delete(traceId)
+    }
+  }
+
+  // Called with the trace ID returned by an input request
+  const trackInputTrace = (traceId: string | undefined, sentAt: number) => {
+    pruneTraces(performance.now())
+    if (!traceId) return
+    const received = receivedTracesRef.current.get(traceId)
+    if (received !== undefined) {
+      receivedTracesRef.current.delete(traceId)
+      reportTrace(traceId, received.pollId, received.receivedAt - sentAt)
+    } else {
+      pendingTracesRef.current.set(traceId, sentAt)
+    }
+  }
+
+  // Called for every received frame with the trace IDs it carries
+  const handleFrameTraces = (traceIds: string[] | undefined, pollId: number | undefined) => {
+    const receivedAt = performance.now()
+    pruneTraces(receivedAt)
+    if (!traceIds || pollId === undefined) return
+    for (const traceId of traceIds) {
+      if (reportedTracesRef.current.has(traceId) || receivedTracesRef.current.has(traceId)) continue
+      const sentAt = pendingTracesRef.current.get(traceId)
+      if (sentAt !== undefined) {
+        pendingTracesRef.current.delete(traceId)
+        reportTrace(traceId, pollId, receivedAt - sentAt)
+      } else {
+        receivedTracesRef.current.set(traceId, { receivedAt, pollId })
+      }
+    }
+  }
+
+  const loadBrowserProfiles = async () => {
+    try {
+      const response = await fetch(`${API_URL}/browser_profiles`)
+      const data = await response.json()
+      
+      setAvailableProfiles(Object.keys(data.profiles))
+      setBrowserProfile(data.active || data.default)
+    } catch (error) {
+      logToConsole(`Error loading browser profiles: ${error}`, true)
+    }
+  }
+
   const checkBrowserStatus = async () => {
     try {
       logToConsole("Checking browser status...")
@@ -98,6 +239,9 @@ export default function Home() {
       const data = await response.json()
       
       setIsBrowserRunning(data.running)
+      if (data.profile) {
+        setBrowserProfile(data.profile)
+      }
       const status = data.running ? "Browser is running" : "Browser is not running"
       showStatus(status)
       
@@ -114,12 +258,13 @@ export default function Home() {
 
   const startBrowser = async () => {
     try {
-      logToConsole("Starting browser...")
+      logToConsole(`Starting browser with profile: ${browserProfile}`)
       setLoading(true)
       
       const response = await fetch(`${API_URL}/start_browser`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' }
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ profile: browserProfile })
       })
       
       const data = await response.json()
@@ -128,6 +273,7 @@ export default function Home() {
       if (data.status === 'success') {
         setIsBrowserRunning(true)
         showStatus(data.message)
+        registerViewport()
         if (isStreamActive) {
           startDirectStreaming()
         }
@@ -215,6 +361,7 @@ export default function Home() {
         
         if (data.data) {
           setScreenshotData(data.data)
+          handleFrameTraces(data.trace_ids, data.poll_id)
         }
       } catch (error) {
         if (error instanceof Error && error.name !== 'AbortError') {
@@ -240,6 +387,7 @@ export default function Home() {
       logToConsole(`Clicking at coordinates: (${x}, ${y})`)
       setLoading(true)
       
+      const sentAt = performance.now()
       const response = await fetch(`${API_URL}/click`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
@@ -250,6 +398,7 @@ export default function Home() {
       setLoading(false)
       
       if (data.status === 'success') {
+        trackInputTrace(data.trace_id, sentAt)
         showStatus(data.message)
       } else {
         showStatus(data.message, true)
@@ -266,6 +415,7 @@ export default function Home() {
     try {
       logToConsole(`Sending text input: "${text}"`)
       
+      const sentAt = performance.now()
       const response = await fetch(`${API_URL}/type_text`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
@@ -274,7 +424,9 @@ export default function Home() {
       
       const data = await response.json()
       
-      if (data.status !== 'success') {
+      if (data.status === 'success') {
+        trackInputTrace(data.trace_id, sentAt)
+      } else {
         showStatus(data.message, true)
       }
     } catch (error) {
@@ -287,6 +439,7 @@ export default function Home() {
       const keyToSend = key === 'Enter' ? 'ENTER' : 'BACK_SPACE'
       logToConsole(`Sending special key: ${keyToSend}`)
       
+      const sentAt = performance.now()
       const response = await fetch(`${API_URL}/send_key`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
@@ -298,7 +451,9 @@ export default function Home() {
       
       const data = await response.json()
       
-      if (data.status !== 'success') {
+      if (data.status === 'success') {
+        trackInputTrace(data.trace_id, sentAt)
+      } else {
         showStatus(data.message, true)
       }
     } catch (error) {
@@ -327,8 +482,8 @@ export default function Home() {
     const rect = screenshotRef.current.getBoundingClientRect()
     const canvasWidth = rect.width
     const canvasHeight = rect.height
-    const browserWidth = 1920
-    const browserHeight = 1080
+    const browserWidth = viewport.width
+    const browserHeight = viewport.height
 
     // Calculate scale factors
     const scaleX = browserWidth / canvasWidth 
@@ -370,10 +525,9 @@ export default function Home() {
     const percentX = localX / canvasWidth
     const percentY = localY / canvasHeight
     
-    // Apply percentages to the actual browser dimensions
-    // Assuming the headless browser is actually 1920×1080
-    const browserX = Math.round(percentX * 1920)
-    const browserY = Math.round(percentY * 966)
+    // Apply percentages to the registered remote viewport
+    const browserX = Math.round(percentX * viewport.width)
+    const browserY = Math.round(percentY * viewport.height)
     
     console.log('Click coordinates:', { 
       canvasWidth, canvasHeight,
@@ -391,6 +545,7 @@ export default function Home() {
       logToConsole(`Scrolling by: (${deltaX}, ${deltaY})`)
       console.log(`Sending scroll request to ${API_URL}/scroll with:`, { deltaX, deltaY })
       
+      const sentAt = performance.now()
       const response = await fetch(`${API_URL}/scroll`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
@@ -402,6 +557,7 @@ export default function Home() {
       console.log('Scroll API response data:', data)
       
       if (data.status === 'success') {
+        trackInputTrace(data.trace_id, sentAt)
         logToConsole(`Scroll position: (${data.position[0]}, ${data.position[1]})`)
       } else {
         showStatus(data.message, true)
@@ -490,6 +646,17 @@ export default function Home() {
           <div className="browserHeader">
             <div className="controlPanel">
               <div className="controlRow">
+                <select
+                  className="cyberButton"
+                  value={browserProfile}
+                  onChange={(e) => setBrowserProfile(e.target.value)}
+                  disabled={isBrowserRunning}
+                  title="Browser profile"
+                >
+                  {availableProfiles.map((profile) => (
+                    <option key={profile} value={profile}>{profile.toUpperCase()}</option>
+                  ))}
+                </select>
                 <button 
                   className="cyberButton" 
                   onClick={startBrowser}
@@ -559,7 +726,7 @@ export default function Home() {
 
             </div>
           </div>
-          <div className={`browserView ${isBrowserFocused ? "focused" : ""}`}>
+          <div ref={browserViewRef} className={`browserView ${isBrowserFocused ? "focused" : ""}`}>
             {loading && (
               <div className="loading">
                 <div className="loadingText">LOADING...</div>